@@ -1,31 +1,181 @@
 """File collection core logic without UI dependencies."""
 
+import ctypes
+import errno
+import functools
+import hashlib
 import logging
 import logging.handlers
 import os
+import queue
 import shutil
+import sqlite3
+import sys
+import threading
 import time
 import tomllib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
 from datetime import datetime
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Any, Callable, Generator, Iterator, Optional, TextIO
+
+if sys.platform.startswith("linux"):
+    import fcntl
+
+try:
+    import blake3
+
+    HASH_ALGORITHM = "blake3"
+except ImportError:  # optional accelerated backend
+    HASH_ALGORITHM = "blake2b"
 
 # Constants
 LOG_MAX_MB = 5
 LOG_BACKUPS = 3
-HASH_CHUNK_SIZE = 8192
+LOG_WRITE_BUFFER = 1024 * 1024
+HEAD_HASH_SIZE = 64 * 1024
 DEFAULT_DATE_FOLDER = "no_dates"
 DISK_SAFETY_MARGIN = 1.10
+HASH_WORKERS = min(32, (os.cpu_count() or 1) * 4)  # hashing is largely I/O-bound
+FICLONE = 0x40049409  # Linux ioctl: clone extents of another file (reflink)
+COPY_RANGE_CHUNK = 1024 * 1024 * 1024
+UI_UPDATE_INTERVAL = 0.1  # seconds between status/progress callbacks
+DATE_SLOT_SECONDS = 900  # UTC offsets and DST switches all fall on 15-minute boundaries
+PREVIEW_MAX_FILES = 200
+PREVIEW_MANIFEST = "_all_files.txt"
+# NTFS and default APFS ignore case: "IMG.JPG" and "img.jpg" name the same file there.
+CASE_INSENSITIVE_NAMES = sys.platform in ("win32", "darwin")
+HASH_CACHE_PATH = Path.home() / ".file_collector" / "hash_cache.sqlite3"
+HASH_CACHE_SCHEMA = 2  # bump to drop caches written with an older key layout
+HASH_CACHE_MAX_AGE_DAYS = 90  # rows for files not seen in this long are pruned
 
 # File types
-FILE_TYPES: dict[str, set[str]] = {
-    "Images": {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff", ".webp"},
-    "Documents": {".pdf", ".docx", ".txt", ".xlsx", ".csv", ".pptx"},
-    "Videos": {".mp4", ".mov", ".avi", ".mkv", ".3gp", ".wmv", ".m4v"},
-    "Audio": {".mp3", ".wav", ".m4a", ".ogg", ".flac", ".aac"},
-    "Archives": {".zip", ".rar", ".7z", ".tar", ".gz", ".iso"},
+FILE_TYPES: dict[str, frozenset[str]] = {
+    "Images": frozenset({".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff", ".webp"}),
+    "Documents": frozenset({".pdf", ".docx", ".txt", ".xlsx", ".csv", ".pptx"}),
+    "Videos": frozenset({".mp4", ".mov", ".avi", ".mkv", ".3gp", ".wmv", ".m4v"}),
+    "Audio": frozenset({".mp3", ".wav", ".m4a", ".ogg", ".flac", ".aac"}),
+    "Archives": frozenset({".zip", ".rar", ".7z", ".tar", ".gz", ".iso"}),
+}
+EXT_TO_CATEGORY: dict[str, str] = {
+    ext: category for category, exts in FILE_TYPES.items() for ext in exts
 }
 
+# Scan result: (path, category, stat taken during the scan)
+ScannedFile = tuple[Path, str, os.stat_result]
+# Duplicate key: (size, content digest), or (size, mtime) for metadata-only dry runs
+DedupKey = tuple[int, bytes | int]
+# Digest cache key: (dev, ino, size, mtime_ns, ctime_ns, algorithm)
+HashCacheKey = tuple[int, int, int, int, int, str]
+
+
+def _load_clonefile() -> Any:
+    """Return libc clonefile(2) on macOS (APFS copy-on-write clones), else None."""
+    if sys.platform != "darwin":
+        return None
+    try:
+        return ctypes.CDLL(None, use_errno=True).clonefile
+    except (OSError, AttributeError):
+        return None
+
+
+_clonefile = _load_clonefile()
+# Devices where FICLONE already failed; later copies there go straight to copy_file_range.
+_no_reflink_devices: set[int] = set()
+
+
+def _new_hasher() -> Any:
+    """Return a fresh 256-bit content hasher (BLAKE3 when installed, else BLAKE2b)."""
+    if HASH_ALGORITHM == "blake3":
+        return blake3.blake3()
+    return hashlib.blake2b(digest_size=32)
+
+
+def _name_key(name: str) -> str:
+    """Return the form of name that the target filesystem compares for collisions."""
+    return name.casefold() if CASE_INSENSITIVE_NAMES else name
+
+
+def _existing_names(directory: Path) -> set[str]:
+    """Return name keys of entries already present in directory (empty if it is missing)."""
+    try:
+        with os.scandir(directory) as it:
+            return {_name_key(entry.name) for entry in it}
+    except FileNotFoundError:
+        return set()
+
+
+@functools.lru_cache(maxsize=4096)
+def _slot_date_folder(slot: int) -> Optional[str]:
+    """Return the local YYYY-MM-DD of a DATE_SLOT_SECONDS slot, or None if it spans midnight."""
+    first = time.localtime(slot * DATE_SLOT_SECONDS)
+    last = time.localtime(slot * DATE_SLOT_SECONDS + DATE_SLOT_SECONDS - 1)
+    if first[:3] != last[:3]:
+        return None
+    return f"{first.tm_year:04d}-{first.tm_mon:02d}-{first.tm_mday:02d}"
+
+
+def _open_hash_cache() -> Optional[sqlite3.Connection]:
+    """Open the persistent digest cache at HASH_CACHE_PATH; None if it is unusable."""
+    try:
+        HASH_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(HASH_CACHE_PATH)
+        with conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] != HASH_CACHE_SCHEMA:
+                conn.execute("DROP TABLE IF EXISTS digests")
+                conn.execute(f"PRAGMA user_version = {HASH_CACHE_SCHEMA:d}")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS digests ("
+                "dev INTEGER, ino INTEGER, size INTEGER, mtime_ns INTEGER, ctime_ns INTEGER, "
+                "algorithm TEXT, digest BLOB NOT NULL, last_seen INTEGER NOT NULL, "
+                "PRIMARY KEY (dev, ino, size, mtime_ns, ctime_ns, algorithm))"
+            )
+        return conn
+    except sqlite3.DatabaseError:
+        logger.warning("Hash cache at %s is damaged, resetting it", HASH_CACHE_PATH, exc_info=True)
+        _reset_hash_cache()
+        return None
+    except (OSError, sqlite3.Error):
+        logger.warning("Hash cache unavailable at %s", HASH_CACHE_PATH, exc_info=True)
+        return None
+
+
+def _reset_hash_cache() -> None:
+    """Delete a damaged digest cache so the next run starts from an empty one."""
+    with suppress(OSError):
+        os.unlink(HASH_CACHE_PATH)
+
+
+def _hash_cache_key(st: os.stat_result) -> HashCacheKey:
+    """Identify file contents by inode and change stamps, per hash algorithm."""
+    # ctime moves on any in-place write, even when an editor restores mtime (exiftool -P,
+    # touch -r). On Windows st_ctime is the creation time, which says nothing about edits.
+    ctime_ns = st.st_ctime_ns if os.name == "posix" else 0
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, ctime_ns, HASH_ALGORITHM)
+
+
+def _drain_log(
+    log_queue: "queue.Queue[Optional[str]]", log_file: TextIO, errors: list[Exception]
+) -> None:
+    """
+    Write queued run-log lines to log_file until a None sentinel, then close it.
+
+    Any failed write or close is appended to errors for the producer to raise; the rest
+    of the queue is then discarded up to the sentinel so the producer's join() returns.
+    """
+    drained = False
+    try:
+        with log_file:
+            while (line := log_queue.get()) is not None:
+                log_file.write(line)
+            drained = True
+    except Exception as exc:  # re-raised on the producer thread
+        errors.append(exc)
+        while not drained and log_queue.get() is not None:
+            pass
+
 
 def _load_disk_safety_margin(default: float = DISK_SAFETY_MARGIN) -> float:
     """Load disk safety margin from pyproject.toml; fallback to default on any error."""
@@ -80,26 +230,46 @@ class FileCollectorCore:
     """Core file collection logic without UI."""
 
     @staticmethod
-    def file_hash(filepath: Path) -> Optional[str]:
+    def file_hash(filepath: Path) -> Optional[bytes]:
         """
-        Compute SHA-256 hash of a file.
+        Compute the content hash of a file used for duplicate detection.
 
         Args:
             filepath: Path to the file.
 
         Returns:
-            Hex digest of SHA-256 or None on error.
+            Raw 32-byte digest or None on error.
         """
         try:
-            import hashlib
+            # file_digest reads into one reusable buffer; unbuffered I/O lets readinto go
+            # straight to the OS instead of copying through a BufferedReader first.
+            with open(filepath, "rb", buffering=0) as f:
+                if hasattr(os, "posix_fadvise"):
+                    # Whole-file sequential read: let the kernel read ahead aggressively.
+                    # Only a hint, so a filesystem that rejects it must not fail the hash.
+                    with suppress(OSError):
+                        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                return hashlib.file_digest(f, _new_hasher).digest()
+        except (OSError, ValueError) as exc:
+            logger.exception("Hashing failed for %s: %s", filepath, exc)
+            return None
+
+    @staticmethod
+    def file_head_hash(filepath: Path) -> Optional[bytes]:
+        """
+        Compute a cheap BLAKE2b digest over the first HEAD_HASH_SIZE bytes of a file.
+
+        Args:
+            filepath: Path to the file.
 
-            hasher = hashlib.sha256()
+        Returns:
+            16-byte digest or None on error.
+        """
+        try:
             with open(filepath, "rb") as f:
-                while chunk := f.read(HASH_CHUNK_SIZE):
-                    hasher.update(chunk)
-            return hasher.hexdigest()
+                return hashlib.blake2b(f.read(HEAD_HASH_SIZE), digest_size=16).digest()
         except (OSError, ValueError) as exc:
-            logger.exception("Hashing failed for %s: %s", filepath, exc)
+            logger.exception("Head hashing failed for %s: %s", filepath, exc)
             return None
 
     @staticmethod
@@ -114,13 +284,41 @@ class FileCollectorCore:
             Date string or DEFAULT_DATE_FOLDER on failure.
         """
         try:
-            return datetime.fromtimestamp(path.stat().st_mtime).strftime("%Y-%m-%d")
-        except (OSError, ValueError):
+            st = path.stat()
+        except OSError:
             logger.warning("Failed to read modification time for %s", path)
             return DEFAULT_DATE_FOLDER
+        return FileCollectorCore.get_date_folder_from_stat(st)
+
+    @staticmethod
+    def get_date_folder_from_stat(st: os.stat_result) -> str:
+        """
+        Return folder name (YYYY-MM-DD) from an existing stat result, without a syscall.
+
+        Args:
+            st: Stat result of the file.
+
+        Returns:
+            Date string or DEFAULT_DATE_FOLDER on failure.
+        """
+        try:
+            # Files from one import session share a handful of slots; reuse their date.
+            folder = _slot_date_folder(int(st.st_mtime // DATE_SLOT_SECONDS))
+            if folder is not None:
+                return folder
+            tm = time.localtime(st.st_mtime)
+            return f"{tm.tm_year:04d}-{tm.tm_mon:02d}-{tm.tm_mday:02d}"
+        except (OSError, ValueError, OverflowError):
+            logger.warning("Invalid modification time %s", st.st_mtime)
+            return DEFAULT_DATE_FOLDER
 
     @staticmethod
-    def get_unique_name(base_path: Path, filename: str, suffix: str = "") -> Path:
+    def get_unique_name(
+        base_path: Path,
+        filename: str,
+        suffix: str = "",
+        used_names: Optional[set[str]] = None,
+    ) -> Path:
         """
         Generate a unique path in base_path for filename.
 
@@ -128,17 +326,32 @@ class FileCollectorCore:
             base_path: Directory where file will go.
             filename: Original filename.
             suffix: Optional suffix to add before numbering.
+            used_names: Optional set of name keys (see _name_key) already taken in
+                base_path. When given, it is consulted instead of the filesystem and the
+                result is added to it.
 
         Returns:
             Path object with a non-colliding filename.
         """
+
+        # Probe plain strings; only the returned name becomes a Path.
+        prefix = os.path.join(os.fspath(base_path), "")
+
+        def is_taken(candidate: str) -> bool:
+            if used_names is not None:
+                return _name_key(candidate) in used_names
+            # lexists: a dangling symlink still occupies the name.
+            return os.path.lexists(prefix + candidate)
+
         name, ext = os.path.splitext(filename)
-        candidate = base_path / f"{name}{suffix}{ext}"
+        candidate = f"{name}{suffix}{ext}"
         i = 1
-        while candidate.exists():
-            candidate = base_path / f"{name}{suffix}_{i}{ext}"
+        while is_taken(candidate):
+            candidate = f"{name}{suffix}_{i}{ext}"
             i += 1
-        return candidate
+        if used_names is not None:
+            used_names.add(_name_key(candidate))
+        return base_path / candidate
 
     @staticmethod
     def categorize_file(path: Path) -> str:
@@ -151,86 +364,221 @@ class FileCollectorCore:
         Returns:
             Category name or "OTHER".
         """
-        ext = path.suffix.lower()
-        for category, ext_set in FILE_TYPES.items():
-            if ext in ext_set:
-                return category
-        return "OTHER"
+        return EXT_TO_CATEGORY.get(path.suffix.lower(), "OTHER")
+
+    @staticmethod
+    def iter_files(directory: str) -> Iterator[os.DirEntry[str]]:
+        """
+        Recursively yield regular-file entries below directory using os.scandir.
+
+        DirEntry caches the file type reported by the directory listing, so no extra
+        stat call is needed to tell files from directories. An explicit stack keeps a
+        single directory handle open at a time and avoids recursion limits.
+
+        Args:
+            directory: Folder to scan.
+
+        Yields:
+            os.DirEntry for each file (symlinked directories are not followed).
+        """
+        stack = [directory]
+        while stack:
+            current = stack.pop()
+            subdirs: list[str] = []
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.is_file():
+                            yield entry
+            except OSError:
+                logger.warning("Failed to scan directory %s", current)
+            # Reverse so subdirectories are visited in listing order.
+            stack.extend(reversed(subdirs))
 
     @staticmethod
-    def filter_files(source_dir: str, selected_types: list[str]) -> list[tuple[Path, str]]:
+    def filter_files(source_dir: str, selected_types: list[str]) -> list[ScannedFile]:
         """
-        Walk directory and return list of (file_path, category) filtered by selected_types.
+        Walk directory and return (file_path, category, stat) filtered by selected_types.
 
         Args:
             source_dir: Root folder to scan.
             selected_types: Categories to include (may include "All").
 
         Returns:
-            List of tuples (Path, category).
+            List of tuples (Path, category, os.stat_result).
         """
-        results: list[tuple[Path, str]] = []
-        for root, _, files in os.walk(source_dir):
-            for fname in files:
-                src_path = Path(root) / fname
-                category = FileCollectorCore.categorize_file(src_path)
-                if "All" in selected_types or category in selected_types:
-                    results.append((src_path, category))
+        results: list[ScannedFile] = []
+        selected_set = set(selected_types)
+        wants_all = "All" in selected_set
+        # Unless unknown extensions are wanted, reject entries with one set lookup.
+        allowed_exts: Optional[frozenset[str]] = None
+        if not wants_all and "OTHER" not in selected_set:
+            allowed_exts = frozenset().union(
+                *(FILE_TYPES[c] for c in selected_set if c in FILE_TYPES)
+            )
+
+        for entry in FileCollectorCore.iter_files(source_dir):
+            ext = os.path.splitext(entry.name)[1].lower()
+            if allowed_exts is not None:
+                if ext not in allowed_exts:
+                    continue
+                category = EXT_TO_CATEGORY[ext]
+            else:
+                category = EXT_TO_CATEGORY.get(ext, "OTHER")
+                if not wants_all and category not in selected_set:
+                    continue
+            try:
+                st = entry.stat()
+            except OSError:
+                logger.warning("Failed to stat %s", entry.path)
+                continue
+            results.append((Path(entry.path), category, st))
         logger.info("Scanned %s -> found %d files", source_dir, len(results))
         return results
 
     @staticmethod
-    def preview_files(files: list[tuple[Path, str]], temp_dir: Path) -> None:
+    def preview_files(
+        files: list[ScannedFile], temp_dir: Path, limit: int = PREVIEW_MAX_FILES
+    ) -> None:
         """
         Create preview area with symlinks/hardlinks or copies.
 
+        Only the first `limit` files are linked; the full list of matched paths is
+        written to a PREVIEW_MANIFEST text file so large scans stay O(1) in syscalls.
+
         Args:
-            files: List of (Path, category).
+            files: List of (Path, category, stat).
             temp_dir: Directory to create preview files in.
+            limit: Maximum number of files to link into the preview.
         """
         os.makedirs(temp_dir, exist_ok=True)
-        used_names: set[str] = set()
-        for src, _ in files:
-            dst = temp_dir / src.name
-            # Avoid collision: if filename already used, add numeric suffix.
-            if dst.name in used_names:
-                base, ext = os.path.splitext(src.name)
-                i = 1
-                while f"{base}_{i}{ext}" in used_names:
-                    i += 1
-                dst = temp_dir / f"{base}_{i}{ext}"
-            used_names.add(dst.name)
-            try:
-                # On Windows creating symlinks may require admin; handle gracefully.
-                os.symlink(src, dst)
-            except (OSError, NotImplementedError) as exc:
-                if os.name == "nt":
-                    logger.warning(
-                        "Symlink failed for %s (Windows may require admin): %s", src, exc
-                    )
-                else:
-                    logger.warning("Symlink failed for %s: %s", src, exc)
+        # surrogateescape writes undecodable POSIX names back as their original bytes.
+        with open(
+            temp_dir / PREVIEW_MANIFEST, "w", encoding="utf-8", errors="surrogateescape"
+        ) as f:
+            f.writelines(f"{src}\n" for src, _, _ in files)
+        used_names: set[str] = {_name_key(PREVIEW_MANIFEST)}
+        # Resolve temp_dir once and create links relative to it where the OS allows.
+        dir_fd: Optional[int] = None
+        if os.symlink in os.supports_dir_fd and os.link in os.supports_dir_fd:
+            dir_fd = os.open(temp_dir, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+        try:
+            for src, _, _ in files[:limit]:
+                name = src.name
+                # Avoid collision: if filename already used, add numeric suffix.
+                if _name_key(name) in used_names:
+                    base, ext = os.path.splitext(src.name)
+                    i = 1
+                    while _name_key(f"{base}_{i}{ext}") in used_names:
+                        i += 1
+                    name = f"{base}_{i}{ext}"
+                used_names.add(_name_key(name))
+                dst = temp_dir / name
+                link_dst = name if dir_fd is not None else dst
                 try:
-                    os.link(src, dst)
-                except (OSError, NotImplementedError):
-                    shutil.copy2(src, dst)
-                    logger.warning("Fallback to copy for %s", src)
+                    # On Windows creating symlinks may require admin; handle gracefully.
+                    os.symlink(src, link_dst, dir_fd=dir_fd)
+                except (OSError, NotImplementedError) as exc:
+                    if os.name == "nt":
+                        logger.warning(
+                            "Symlink failed for %s (Windows may require admin): %s", src, exc
+                        )
+                    else:
+                        logger.warning("Symlink failed for %s: %s", src, exc)
+                    try:
+                        os.link(src, link_dst, dst_dir_fd=dir_fd)
+                    except (OSError, NotImplementedError):
+                        shutil.copy2(src, dst)
+                        logger.warning("Fallback to copy for %s", src)
+        finally:
+            if dir_fd is not None:
+                os.close(dir_fd)
 
     @staticmethod
-    def estimate_total_size(files: list[tuple[Path, str]]) -> int:
-        """Estimate total byte size of files, skipping unreadable paths."""
-        total_size = 0
-        for src_path, _ in files:
+    def fast_copy(src: Path, dst: Path, src_stat: Optional[os.stat_result] = None) -> None:
+        """
+        Copy src to dst with metadata, letting the kernel move the data when possible.
+
+        On Linux this tries a copy-on-write clone (FICLONE) when src and dst share a
+        filesystem that supports it, then os.copy_file_range; on macOS it tries
+        clonefile(2). Anything else, or a failure, falls back to shutil.copy2 (which
+        itself uses sendfile/fcopyfile where available).
+
+        dst is always created exclusively, so an existing file is never overwritten; if
+        the copy fails after that, the partial dst is removed again.
+
+        Args:
+            src: Source file.
+            dst: Destination file; must not exist yet.
+            src_stat: Optional cached stat of src, used instead of a fresh fstat.
+
+        Raises:
+            FileExistsError: If dst already exists.
+        """
+        created = False
+        if _clonefile is not None:
+            # Clones share data and carry over metadata; dst must not exist yet.
+            if _clonefile(os.fsencode(src), os.fsencode(dst), 0) == 0:
+                return
+            err = ctypes.get_errno()
+            if err == errno.EEXIST:
+                raise FileExistsError(err, os.strerror(err), os.fspath(dst))
+            logger.debug("clonefile failed for %s: %s", src, os.strerror(err))
+        elif sys.platform.startswith("linux"):
             try:
-                total_size += src_path.stat().st_size
-            except OSError:
-                logger.warning("Failed to stat file size for %s", src_path)
-        return total_size
+                with open(src, "rb") as fsrc, open(dst, "xb") as fdst:
+                    created = True
+                    src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+                    src_info = src_stat or os.fstat(src_fd)
+                    dst_dev = os.fstat(dst_fd).st_dev
+                    # Reflinks only work within one filesystem, and a filesystem without
+                    # reflink support rejects them all: skip the doomed ioctl there.
+                    cloned = False
+                    if src_info.st_dev == dst_dev and dst_dev not in _no_reflink_devices:
+                        try:
+                            fcntl.ioctl(dst_fd, FICLONE, src_fd)
+                            cloned = True
+                        except OSError as exc:
+                            # EINVAL/EXDEV can be per file (btrfs NOCOW mismatch, bind
+                            # mounts), so those only fall back for this copy.
+                            if exc.errno in (errno.EOPNOTSUPP, errno.ENOTTY):
+                                _no_reflink_devices.add(dst_dev)
+                    if not cloned:
+                        expected = src_info.st_size
+                        copied = 0
+                        while chunk := os.copy_file_range(src_fd, dst_fd, COPY_RANGE_CHUNK):
+                            copied += chunk
+                        if copied != expected:
+                            raise OSError(f"Short kernel copy for {src}")
+                shutil.copystat(src, dst)
+                return
+            except OSError as exc:
+                if not created:
+                    raise
+                logger.debug("Kernel copy failed for %s, using shutil.copy2: %s", src, exc)
+        if not created:
+            # Claim the name first: copy2 itself would overwrite whatever is there.
+            with open(dst, "xb"):
+                pass
+        try:
+            shutil.copy2(src, dst)
+        except BaseException:
+            # dst is known to be ours here; never unlink a path this call did not create.
+            with suppress(OSError):
+                os.unlink(dst)
+            raise
+
+    @staticmethod
+    def estimate_total_size(files: list[ScannedFile]) -> int:
+        """Estimate total byte size of files from their scan-time stat results."""
+        return sum(st.st_size for _, _, st in files)
 
     @staticmethod
     def check_disk_space(
         target_dir: Path,
-        files: list[tuple[Path, str]],
+        files: list[ScannedFile],
         safety_margin: float = DISK_SAFETY_MARGIN,
     ) -> tuple[bool, int, int]:
         """
@@ -248,82 +596,299 @@ class FileCollectorCore:
         has_space = free_bytes >= required_bytes
         return has_space, required_bytes, free_bytes
 
+    @staticmethod
+    def iter_dedup_keys(
+        files: list[ScannedFile],
+    ) -> Generator[tuple[Optional[DedupKey], bool], None, None]:
+        """
+        Yield duplicate-detection keys in file order, as soon as each one is known.
+
+        Files are bucketed by size, then by head hash; only files whose head hash
+        collides with another file of the same size are fully hashed, and digests of
+        files unchanged since an earlier run come from the cache at HASH_CACHE_PATH.
+        Full hashes run in the background while the caller consumes earlier results,
+        so copying overlaps hashing.
+
+        Args:
+            files: List of (Path, category, stat).
+
+        Yields:
+            (key, readable) per file: key is (size, digest), or None when the file
+            cannot have a duplicate; readable is False when hashing failed.
+        """
+        sizes = [st.st_size for _, _, st in files]
+        size_groups: defaultdict[int, list[int]] = defaultdict(list)
+        for i, size in enumerate(sizes):
+            size_groups[size].append(i)
+
+        cache: Optional[sqlite3.Connection] = None
+        new_digests: list[tuple[HashCacheKey, bytes]] = []
+        seen_keys: list[HashCacheKey] = []
+        # hashlib/blake3 release the GIL while hashing, so threads overlap I/O and compute.
+        pool = ThreadPoolExecutor(max_workers=HASH_WORKERS)
+        try:
+            head_candidates = [i for group in size_groups.values() if len(group) > 1 for i in group]
+            heads = pool.map(
+                FileCollectorCore.file_head_hash, [files[i][0] for i in head_candidates]
+            )
+            unreadable: set[int] = set()
+            head_groups: defaultdict[tuple[int, bytes], list[int]] = defaultdict(list)
+            for i, head in zip(head_candidates, heads, strict=True):
+                if head is None:
+                    unreadable.add(i)
+                else:
+                    head_groups[(sizes[i], head)].append(i)
+
+            full_candidates = [
+                i for group in head_groups.values() if len(group) > 1 for i in group
+            ]
+            # Unchanged files keep their digest from earlier runs over the same tree.
+            cached: dict[int, bytes] = {}
+            if full_candidates:
+                cache = _open_hash_cache()
+            if cache is not None:
+                try:
+                    for i in full_candidates:
+                        cache_key = _hash_cache_key(files[i][2])
+                        row = cache.execute(
+                            "SELECT digest FROM digests WHERE dev = ? AND ino = ? AND size = ? "
+                            "AND mtime_ns = ? AND ctime_ns = ? AND algorithm = ?",
+                            cache_key,
+                        ).fetchone()
+                        if row is not None:
+                            cached[i] = row[0]
+                            seen_keys.append(cache_key)
+                except sqlite3.Error:
+                    # A damaged cache must never fail the run: hash everything this time.
+                    logger.warning("Hash cache lookup failed, resetting it", exc_info=True)
+                    cache.close()
+                    cache = None
+                    cached.clear()
+                    seen_keys.clear()
+                    _reset_hash_cache()
+
+            # Sorted, so digests come back in the order the caller walks the files.
+            to_hash = sorted(i for i in full_candidates if i not in cached)
+            digests = pool.map(FileCollectorCore.file_hash, [files[i][0] for i in to_hash])
+            next_candidate = iter(to_hash)
+            pending = next(next_candidate, None)
+            for i in range(len(files)):
+                if i in unreadable:
+                    yield None, False
+                elif i in cached:
+                    yield (sizes[i], cached[i]), True
+                elif i == pending:
+                    file_h = next(digests)
+                    pending = next(next_candidate, None)
+                    if file_h is None:
+                        yield None, False
+                    else:
+                        new_digests.append((_hash_cache_key(files[i][2]), file_h))
+                        yield (sizes[i], file_h), True
+                else:
+                    yield None, True
+        finally:
+            # Stopped early (e.g. a copy error propagated): drop hashes nobody will read.
+            pool.shutdown(cancel_futures=True)
+            if cache is not None:
+                now = int(time.time())
+                try:
+                    with cache:
+                        cache.executemany(
+                            "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                            [(*key, digest, now) for key, digest in new_digests],
+                        )
+                        cache.executemany(
+                            "UPDATE digests SET last_seen = ? WHERE dev = ? AND ino = ? "
+                            "AND size = ? AND mtime_ns = ? AND ctime_ns = ? AND algorithm = ?",
+                            [(now, *key) for key in seen_keys],
+                        )
+                        # Files that were deleted, moved or edited leave rows nobody will hit.
+                        cache.execute(
+                            "DELETE FROM digests WHERE last_seen < ?",
+                            (now - HASH_CACHE_MAX_AGE_DAYS * 86400,),
+                        )
+                except sqlite3.Error:
+                    logger.warning("Failed to update hash cache", exc_info=True)
+                finally:
+                    cache.close()
+
     @staticmethod
     def collect_selected_files(
-        files_to_process: list[tuple[Path, str]],
+        files_to_process: list[ScannedFile],
         target_dir: Path,
         dry_run: bool,
         update_status: Callable[[str], None],
         update_progress: Callable[[int], None],
+        hash_in_dry_run: bool = False,
     ) -> tuple[int, int, Path]:
         """
         Copy files with deduplication and produce a run log.
 
+        Only hashing runs on worker threads; the dedup index, name reservations and
+        callbacks stay on the calling thread, so no locks are needed even on
+        free-threaded (no-GIL) Python builds. Callbacks must marshal to the UI thread.
+
         Args:
-            files_to_process: List of (Path, category) to process.
+            files_to_process: List of (Path, category, stat) to process.
             target_dir: Destination directory root.
             dry_run: If True, don't actually copy.
             update_status: Callback to update status text (UI thread safe).
             update_progress: Callback to update progress (0-100).
+            hash_in_dry_run: If False, a dry run estimates duplicates from (size, mtime)
+                without reading any file; if True, it hashes like a real run.
 
         Returns:
             Tuple of (copied_count, renamed_count, target_dir).
+
+        Raises:
+            OSError: If log.txt cannot be written; the run stops at the next file. Other
+                errors raised by the log writer propagate the same way.
         """
-        hashes: dict[str, str] = {}
+        # Pick up a timezone change made since the last run: localtime only re-reads the
+        # zone after tzset(), and cached slots would keep the old dates regardless.
+        if hasattr(time, "tzset"):
+            time.tzset()
+        _slot_date_folder.cache_clear()
+        hashes: dict[DedupKey, str] = {}
+        used_names: dict[Path, set[str]] = {}
         copied, renamed = 0, 0
-        log_entries: list[str] = []
         total = len(files_to_process) or 1
-        start_time = time.time()
-
-        for i, (src_path, category) in enumerate(files_to_process):
-            elapsed = time.time() - start_time
-            avg_per_file = elapsed / (i + 1)
-            remaining = avg_per_file * (total - i - 1)
-            eta_str = time.strftime("%Mm %Ss", time.gmtime(remaining))
-
-            # update progress via callback (0-100)
-            update_progress(int((i + 1) / total * 100))
-            update_status(f"Copying {src_path.name} ({i + 1}/{total}) – ETA: {eta_str}")
-
-            file_h = FileCollectorCore.file_hash(src_path)
-            if file_h is None:
-                log_entries.append(f"SKIP (unreadable): {src_path}")
-                continue
-
-            date_folder = FileCollectorCore.get_date_folder(src_path)
-            target_subdir = target_dir / f"{category}_{date_folder}"
-
-            if not dry_run:
-                os.makedirs(target_subdir, exist_ok=True)
-
-            if file_h in hashes:
-                new_dst = FileCollectorCore.get_unique_name(target_subdir, src_path.name, "_dup")
-                log_entries.append(f"DUPLICATE: {src_path} -> {new_dst.relative_to(target_dir)}")
-                if not dry_run:
-                    shutil.copy2(src_path, new_dst)
-                renamed += 1
-                continue
-
-            dst_path = FileCollectorCore.get_unique_name(target_subdir, src_path.name)
-            if dst_path.name != src_path.name:
-                renamed += 1
-                log_entries.append(f"RENAME: {src_path.name} -> {dst_path.relative_to(target_dir)}")
-            else:
-                log_entries.append(f"COPY: {src_path.name} -> {dst_path.relative_to(target_dir)}")
-
-            if not dry_run:
-                shutil.copy2(src_path, dst_path)
-
-            hashes[file_h] = dst_path.name
-            copied += 1
-
+        # Destinations all live under target_dir, so slicing off the prefix is enough
+        # to log relative paths without Path.relative_to on every file.
+        rel_start = len(os.path.join(os.fspath(target_dir), ""))
+
+        # Real runs stream log lines to a writer thread instead of holding them in memory.
+        log_queue: queue.Queue[Optional[str]] = queue.Queue()
+        writer: Optional[threading.Thread] = None
+        log_errors: list[Exception] = []
         if not dry_run:
             os.makedirs(target_dir, exist_ok=True)
-            run_log_path = target_dir / "log.txt"
-            with open(run_log_path, "w", encoding="utf-8") as f:
-                f.write(f"Run log at: {datetime.now()}\n")
-                f.write("\n".join(log_entries))
-                f.write(f"\n\nFiles copied: {copied}\nDuplicates renamed: {renamed}\n")
+            # Undecodable file names (surrogate-escaped on POSIX) are logged as escapes.
+            log_file = open(
+                target_dir / "log.txt",
+                "w",
+                encoding="utf-8",
+                errors="backslashreplace",
+                buffering=LOG_WRITE_BUFFER,
+            )
+            writer = threading.Thread(
+                target=_drain_log, args=(log_queue, log_file, log_errors), daemon=True
+            )
+            writer.start()
+            log_queue.put(f"Run log at: {datetime.now()}\n")
+
+        def log_line(entry: str) -> None:
+            if writer is not None:
+                log_queue.put(f"{entry}\n")
+
+        def copy_unique(
+            src_path: Path,
+            st: os.stat_result,
+            target_subdir: Path,
+            subdir_names: set[str],
+            suffix: str,
+        ) -> Optional[Path]:
+            """Copy src_path to a free name in target_subdir; None if the copy failed."""
+            while True:
+                dst_path = FileCollectorCore.get_unique_name(
+                    target_subdir, src_path.name, suffix, subdir_names
+                )
+                if dry_run:
+                    return dst_path
+                try:
+                    # Files that cannot have a duplicate are never read before the copy.
+                    FileCollectorCore.fast_copy(src_path, dst_path, st)
+                    return dst_path
+                except FileExistsError:
+                    # Taken behind the index's back; the name stays reserved, try the next.
+                    continue
+                except OSError:
+                    logger.exception("Copy failed for %s", src_path)
+                    # fast_copy already removed any partial file it created; free the name.
+                    # A file that was there all along keeps it: the next copy hits EEXIST.
+                    subdir_names.discard(_name_key(dst_path.name))
+                    return None
+
+        # Keys are produced lazily, so later files are still hashing while earlier ones copy.
+        metadata_only = dry_run and not hash_in_dry_run
+        dedup_keys: Generator[tuple[Optional[DedupKey], bool], None, None]
+        if metadata_only:
+            # Dry-run estimate: the scan-time stat is enough, no file is read.
+            dedup_keys = (((st.st_size, int(st.st_mtime)), True) for _, _, st in files_to_process)
+        else:
+            dedup_keys = FileCollectorCore.iter_dedup_keys(files_to_process)
 
-        return copied, renamed, target_dir
+        try:
+            if not metadata_only:
+                update_status("Checking for duplicates...")
+            start_time = time.monotonic()
+            last_percent, last_ui_update = -1, 0.0
+
+            for i, ((src_path, category, st), (dedup_key, readable)) in enumerate(
+                zip(files_to_process, dedup_keys, strict=True)
+            ):
+                if log_errors:
+                    # log.txt can no longer be written (disk full, target removed): stop
+                    # instead of reporting success with a truncated log.
+                    raise log_errors[0]
+                # Coalesce UI callbacks: each one becomes a Tk event, so emit only when the
+                # percentage changes or UI_UPDATE_INTERVAL has passed.
+                percent = int((i + 1) / total * 100)
+                now = time.monotonic()
+                if percent != last_percent or now - last_ui_update >= UI_UPDATE_INTERVAL:
+                    last_percent, last_ui_update = percent, now
+                    avg_per_file = (now - start_time) / (i + 1)
+                    remaining = int(avg_per_file * (total - i - 1))
+                    eta_str = f"{remaining // 60:02d}m {remaining % 60:02d}s"
+                    update_progress(percent)
+                    update_status(f"Copying {src_path.name} ({i + 1}/{total}) – ETA: {eta_str}")
+
+                if not readable:
+                    log_line(f"SKIP (unreadable): {src_path}")
+                    continue
+
+                target_subdir = target_dir / (
+                    f"{category}_{FileCollectorCore.get_date_folder_from_stat(st)}"
+                )
+                # Track taken names in memory so collisions cost no extra stat calls.
+                subdir_names = used_names.get(target_subdir)
+                if subdir_names is None:
+                    # Only a handful of distinct folders exist; create each one once.
+                    if not dry_run:
+                        os.makedirs(target_subdir, exist_ok=True)
+                    subdir_names = used_names[target_subdir] = _existing_names(target_subdir)
+
+                is_duplicate = dedup_key is not None and dedup_key in hashes
+                dst_path = copy_unique(
+                    src_path, st, target_subdir, subdir_names, "_dup" if is_duplicate else ""
+                )
+                if dst_path is None:
+                    log_line(f"SKIP (copy failed): {src_path}")
+                    continue
+                if is_duplicate:
+                    log_line(f"DUPLICATE: {src_path} -> {os.fspath(dst_path)[rel_start:]}")
+                    renamed += 1
+                    continue
+
+                if dst_path.name != src_path.name:
+                    renamed += 1
+                    log_line(f"RENAME: {src_path.name} -> {os.fspath(dst_path)[rel_start:]}")
+                else:
+                    log_line(f"COPY: {src_path.name} -> {os.fspath(dst_path)[rel_start:]}")
+
+                if dedup_key is not None:
+                    hashes[dedup_key] = dst_path.name
+                copied += 1
+
+            if writer is not None:
+                log_queue.put(f"\nFiles copied: {copied}\nDuplicates renamed: {renamed}\n")
+        finally:
+            dedup_keys.close()
+            if writer is not None:
+                log_queue.put(None)
+                writer.join()
+        if log_errors:
+            raise log_errors[0]
 
+        return copied, renamed, target_dir
@@ -3,6 +3,14 @@
 import pytest
 
 
+@pytest.fixture(autouse=True)
+def isolated_hash_cache(tmp_path_factory, monkeypatch):
+    """Keep the persistent digest cache out of the user's home directory."""
+    path = tmp_path_factory.mktemp("hash_cache") / "hash_cache.sqlite3"
+    monkeypatch.setattr("core.HASH_CACHE_PATH", path)
+    return path
+
+
 @pytest.fixture
 def mock_messagebox(mocker):
     """Mock tkinter messagebox dialogs."""
@@ -1,13 +1,28 @@
 """Core logic tests for FileCollectorCore."""
 
+import ctypes
+import errno
 import os
+import shutil
+import sqlite3
 import stat
+import sys
+import threading
+import time
 from collections.abc import Generator
+from contextlib import closing
+from datetime import datetime
 from pathlib import Path
 
 import pytest
 
-from core import DEFAULT_DATE_FOLDER, FileCollectorCore
+from core import (
+    DEFAULT_DATE_FOLDER,
+    HASH_CACHE_MAX_AGE_DAYS,
+    HEAD_HASH_SIZE,
+    PREVIEW_MANIFEST,
+    FileCollectorCore,
+)
 
 
 @pytest.fixture
@@ -33,25 +48,89 @@ def unreadable_file(tmp_path: Path) -> Generator[Path, None, None]:
 
 
 def test_file_hash_ok(temp_file: Path) -> None:
-    """Test SHA-256 hash computation."""
+    """Test content hash computation."""
     h = FileCollectorCore.file_hash(temp_file)
-    assert isinstance(h, str) and len(h) == 64  # SHA-256 hex digest
+    assert isinstance(h, bytes) and len(h) == 32  # raw 256-bit digest
 
 
 def test_file_hash_error(monkeypatch, temp_file: Path) -> None:
     """Test graceful handling of file read errors."""
-    def fake_open(*args):
+    def fake_open(*args, **kwargs):
         raise OSError("cannot read file")
     monkeypatch.setattr("builtins.open", fake_open)
     assert FileCollectorCore.file_hash(temp_file) is None
 
 
+@pytest.mark.skipif(not hasattr(os, "posix_fadvise"), reason="posix_fadvise is not available")
+def test_file_hash_ignores_fadvise_failure(monkeypatch, temp_file: Path) -> None:
+    """A rejected readahead hint does not make the file unreadable."""
+    def fail_fadvise(*args):
+        raise OSError(errno.EINVAL, "fadvise not supported")
+    monkeypatch.setattr(os, "posix_fadvise", fail_fadvise)
+    assert FileCollectorCore.file_hash(temp_file) is not None
+
+
+def test_file_head_hash_ok(tmp_path: Path) -> None:
+    """Head hash only depends on the first HEAD_HASH_SIZE bytes."""
+    f1 = tmp_path / "a.bin"
+    f1.write_bytes(b"a" * HEAD_HASH_SIZE + b"tail1")
+    f2 = tmp_path / "b.bin"
+    f2.write_bytes(b"a" * HEAD_HASH_SIZE + b"tail2")
+    h1 = FileCollectorCore.file_head_hash(f1)
+    assert isinstance(h1, bytes) and len(h1) == 16
+    assert h1 == FileCollectorCore.file_head_hash(f2)
+
+
+def test_file_head_hash_error(tmp_path: Path) -> None:
+    """Head hash returns None for missing files."""
+    assert FileCollectorCore.file_head_hash(tmp_path / "missing.bin") is None
+
+
 def test_get_date_folder_ok(temp_file: Path) -> None:
     """Test date folder extraction from file mtime."""
     result = FileCollectorCore.get_date_folder(temp_file)
     assert result.count("-") == 2  # Format YYYY-MM-DD
 
 
+def test_get_date_folder_from_stat(temp_file: Path) -> None:
+    """Test date folder formatting from a cached stat result."""
+    os.utime(temp_file, (1_577_880_000, 1_577_880_000))  # 2020-01-01 12:00 UTC
+    result = FileCollectorCore.get_date_folder_from_stat(temp_file.stat())
+    assert result == datetime.fromtimestamp(1_577_880_000).strftime("%Y-%m-%d")
+
+
+def test_get_date_folder_from_stat_around_midnight(temp_file: Path) -> None:
+    """Cached date slots agree with localtime on both sides of local midnight."""
+    midnight = int(datetime(2021, 3, 14).timestamp())
+    for mtime in range(midnight - 1800, midnight + 1800, 299):
+        os.utime(temp_file, (mtime, mtime))
+        result = FileCollectorCore.get_date_folder_from_stat(temp_file.stat())
+        assert result == datetime.fromtimestamp(mtime).strftime("%Y-%m-%d")
+
+
+@pytest.mark.skipif(not hasattr(time, "tzset"), reason="time.tzset is POSIX-only")
+def test_collect_selected_files_picks_up_timezone_change(tmp_path: Path, monkeypatch) -> None:
+    """A TZ change between runs moves files to the new local date."""
+    src = tmp_path / "a.txt"
+    src.write_text("x")
+    os.utime(src, (1_577_880_000, 1_577_880_000))  # 2020-01-01 12:00 UTC
+    files = [(src, "OTHER", src.stat())]
+
+    def date_dirs(tz: str) -> list[str]:
+        with monkeypatch.context() as mp:
+            mp.setenv("TZ", tz)  # POSIX TZ: "UTC+14" is 14 hours behind UTC
+            _, _, target = FileCollectorCore.collect_selected_files(
+                files, tmp_path / tz, dry_run=False,
+                update_status=lambda x: None,
+                update_progress=lambda x: None,
+            )
+        time.tzset()
+        return sorted(p.name for p in target.iterdir() if p.is_dir())
+
+    assert date_dirs("UTC+14") == ["OTHER_2019-12-31"]
+    assert date_dirs("UTC-14") == ["OTHER_2020-01-02"]
+
+
 def test_get_date_folder_error(monkeypatch, temp_file: Path) -> None:
     """Test fallback for stat errors."""
     monkeypatch.setattr(Path, "stat", lambda self: (_ for _ in ()).throw(OSError("fail")))
@@ -73,6 +152,22 @@ def test_get_unique_name_with_conflict(tmp_path: Path) -> None:
     assert f.name.startswith("file_1")
 
 
+@pytest.mark.skipif(sys.platform == "win32", reason="symlinks need elevated rights on Windows")
+def test_get_unique_name_dangling_symlink(tmp_path: Path) -> None:
+    """A dangling symlink still counts as a taken name."""
+    (tmp_path / "file.txt").symlink_to(tmp_path / "missing.txt")
+    f = FileCollectorCore.get_unique_name(tmp_path, "file.txt")
+    assert f == tmp_path / "file_1.txt"
+
+
+def test_get_unique_name_used_names(tmp_path: Path) -> None:
+    """Test in-memory name reservation without touching the filesystem."""
+    used = {"file.txt", "file_1.txt"}
+    f = FileCollectorCore.get_unique_name(tmp_path, "file.txt", used_names=used)
+    assert f == tmp_path / "file_2.txt"
+    assert "file_2.txt" in used
+
+
 def test_categorize_file_known(temp_file: Path) -> None:
     """Test file categorization for known extensions."""
     p = temp_file.with_suffix(".jpg")
@@ -104,7 +199,29 @@ def test_filter_files_selected(tmp_path: Path) -> None:
     f2 = tmp_path / "b.txt"
     f2.write_text("x")
     result = FileCollectorCore.filter_files(str(tmp_path), ["Images"])
-    assert result == [(f1, "Images")]
+    assert [(p, c) for p, c, _ in result] == [(f1, "Images")]
+    assert result[0][2].st_size == 1
+
+
+def test_filter_files_other(tmp_path: Path) -> None:
+    """Test selecting only unknown extensions via the OTHER category."""
+    (tmp_path / "a.jpg").write_text("x")
+    f2 = tmp_path / "b.zzz"
+    f2.write_text("x")
+    result = FileCollectorCore.filter_files(str(tmp_path), ["OTHER"])
+    assert [(p, c) for p, c, _ in result] == [(f2, "OTHER")]
+
+
+def test_filter_files_recursive(tmp_path: Path) -> None:
+    """Test scanning nested folders and case-insensitive extensions."""
+    nested = tmp_path / "a" / "b"
+    nested.mkdir(parents=True)
+    f1 = nested / "deep.JPG"
+    f1.write_text("x")
+    f2 = tmp_path / "top.png"
+    f2.write_text("x")
+    result = FileCollectorCore.filter_files(str(tmp_path), ["Images"])
+    assert sorted((p, c) for p, c, _ in result) == sorted([(f1, "Images"), (f2, "Images")])
 
 
 def test_preview_files_symlink(tmp_path: Path) -> None:
@@ -112,7 +229,7 @@ def test_preview_files_symlink(tmp_path: Path) -> None:
     src = tmp_path / "a.txt"
     src.write_text("x")
     temp_dir = tmp_path / "preview"
-    FileCollectorCore.preview_files([(src, "OTHER")], temp_dir)
+    FileCollectorCore.preview_files([(src, "OTHER", src.stat())], temp_dir)
     assert any(temp_dir.iterdir())
 
 
@@ -130,7 +247,7 @@ def test_preview_files_fallback_copy(monkeypatch, tmp_path: Path) -> None:
     monkeypatch.setattr(os, "symlink", fail_symlink)
     monkeypatch.setattr(os, "link", fail_link)
 
-    FileCollectorCore.preview_files([(src, "OTHER")], temp_dir)
+    FileCollectorCore.preview_files([(src, "OTHER", src.stat())], temp_dir)
     copied_file = temp_dir / "a.txt"
     assert copied_file.exists()
 
@@ -146,16 +263,133 @@ def test_preview_files_name_collision(tmp_path: Path) -> None:
     src1.write_text("content1")
     src2.write_text("content2")
     temp_dir = tmp_path / "preview"
-    FileCollectorCore.preview_files([(src1, "OTHER"), (src2, "OTHER")], temp_dir)
+    files = [(src1, "OTHER", src1.stat()), (src2, "OTHER", src2.stat())]
+    FileCollectorCore.preview_files(files, temp_dir)
     assert (temp_dir / "same.txt").exists()
     assert (temp_dir / "same_1.txt").exists()
 
 
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="needs byte-string file names")
+def test_preview_files_undecodable_name(tmp_path: Path) -> None:
+    """A non-UTF-8 file name is linked and listed in the manifest as its raw bytes."""
+    src = Path(os.fsdecode(os.path.join(os.fsencode(tmp_path), b"caf\xe9.txt")))
+    src.write_text("x")
+    temp_dir = tmp_path / "preview"
+    FileCollectorCore.preview_files([(src, "OTHER", src.stat())], temp_dir)
+    assert b"caf\xe9.txt\n" in (temp_dir / PREVIEW_MANIFEST).read_bytes()
+    assert (temp_dir / src.name).exists()
+
+
+def test_fast_copy_preserves_content_and_mtime(tmp_path: Path) -> None:
+    """Test fast copy writes identical bytes and keeps the modification time."""
+    src = tmp_path / "a.bin"
+    src.write_bytes(b"payload" * 1000)
+    os.utime(src, (1_600_000_000, 1_600_000_000))
+    dst = tmp_path / "b.bin"
+    FileCollectorCore.fast_copy(src, dst)
+    assert dst.read_bytes() == src.read_bytes()
+    assert int(dst.stat().st_mtime) == 1_600_000_000
+
+
+def test_fast_copy_refuses_existing_dst(tmp_path: Path) -> None:
+    """fast_copy raises instead of overwriting an existing destination."""
+    src = tmp_path / "a.bin"
+    src.write_bytes(b"new")
+    dst = tmp_path / "b.bin"
+    dst.write_bytes(b"old")
+    with pytest.raises(FileExistsError):
+        FileCollectorCore.fast_copy(src, dst)
+    assert dst.read_bytes() == b"old"
+
+
+def test_fast_copy_fallback_copy2(monkeypatch, tmp_path: Path) -> None:
+    """Test fallback to shutil.copy2 when kernel copy primitives fail."""
+    src = tmp_path / "a.bin"
+    src.write_bytes(b"payload")
+    dst = tmp_path / "b.bin"
+
+    def fail_copy_file_range(*args, **kwargs):
+        raise OSError("unsupported")
+
+    monkeypatch.setattr(os, "copy_file_range", fail_copy_file_range, raising=False)
+    monkeypatch.setattr("core.FICLONE", 0)
+    FileCollectorCore.fast_copy(src, dst)
+    assert dst.read_bytes() == b"payload"
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="FICLONE is Linux-only")
+def test_fast_copy_skips_reflink_after_unsupported(monkeypatch, tmp_path: Path) -> None:
+    """A filesystem that rejects FICLONE is not asked again."""
+    calls = []
+
+    def fake_ioctl(*args):
+        calls.append(args)
+        raise OSError(errno.EOPNOTSUPP, "not supported")
+
+    monkeypatch.setattr("core.fcntl.ioctl", fake_ioctl)
+    monkeypatch.setattr("core._no_reflink_devices", set())
+    for name in ("a", "b"):
+        src = tmp_path / f"{name}.bin"
+        src.write_bytes(b"payload")
+        FileCollectorCore.fast_copy(src, tmp_path / f"{name}_copy.bin")
+        assert (tmp_path / f"{name}_copy.bin").read_bytes() == b"payload"
+    assert len(calls) == 1
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="FICLONE is Linux-only")
+def test_fast_copy_per_file_reflink_error_keeps_trying(monkeypatch, tmp_path: Path) -> None:
+    """EINVAL only falls back for that file; later copies still try FICLONE."""
+    calls = []
+
+    def fake_ioctl(*args):
+        calls.append(args)
+        raise OSError(errno.EINVAL, "invalid argument")
+
+    monkeypatch.setattr("core.fcntl.ioctl", fake_ioctl)
+    monkeypatch.setattr("core._no_reflink_devices", set())
+    for name in ("a", "b"):
+        src = tmp_path / f"{name}.bin"
+        src.write_bytes(b"payload")
+        FileCollectorCore.fast_copy(src, tmp_path / f"{name}_copy.bin")
+        assert (tmp_path / f"{name}_copy.bin").read_bytes() == b"payload"
+    assert len(calls) == 2
+
+
+def test_fast_copy_clonefile_failure_falls_back(monkeypatch, tmp_path: Path) -> None:
+    """Test that a failing clonefile (macOS) falls back to a regular copy."""
+    src = tmp_path / "a.bin"
+    src.write_bytes(b"payload")
+    dst = tmp_path / "b.bin"
+
+    def failing_clonefile(*args):
+        # Set errno like the real call; a stale EEXIST would otherwise leak in.
+        ctypes.set_errno(errno.ENOTSUP)
+        return -1
+
+    monkeypatch.setattr("core._clonefile", failing_clonefile)
+    FileCollectorCore.fast_copy(src, dst)
+    assert dst.read_bytes() == b"payload"
+
+
+def test_preview_files_limit_and_manifest(tmp_path: Path) -> None:
+    """Only `limit` files are linked; the manifest lists every file."""
+    files = []
+    for i in range(5):
+        src = tmp_path / f"f{i}.txt"
+        src.write_text("x")
+        files.append((src, "OTHER", src.stat()))
+    temp_dir = tmp_path / "preview"
+    FileCollectorCore.preview_files(files, temp_dir, limit=2)
+    assert sorted(p.name for p in temp_dir.iterdir()) == [PREVIEW_MANIFEST, "f0.txt", "f1.txt"]
+    manifest = (temp_dir / PREVIEW_MANIFEST).read_text(encoding="utf-8").splitlines()
+    assert manifest == [str(src) for src, _, _ in files]
+
+
 def test_collect_selected_files_basic(tmp_path: Path) -> None:
     """Test basic file collection without dry-run."""
     src = tmp_path / "a.txt"
     src.write_text("x")
-    files = [(src, "OTHER")]
+    files = [(src, "OTHER", src.stat())]
 
     copied, renamed, target = FileCollectorCore.collect_selected_files(
         files, tmp_path / "dest", dry_run=False,
@@ -166,13 +400,17 @@ def test_collect_selected_files_basic(tmp_path: Path) -> None:
     assert renamed == 0
     log_file = target / "log.txt"
     assert log_file.exists()
+    log_text = log_file.read_text(encoding="utf-8")
+    rel_dst = os.path.join(f"OTHER_{FileCollectorCore.get_date_folder(src)}", "a.txt")
+    assert f"COPY: a.txt -> {rel_dst}" in log_text
+    assert log_text.endswith("Files copied: 1\nDuplicates renamed: 0\n")
 
 
 def test_collect_selected_files_dry_run(tmp_path: Path) -> None:
     """Test dry-run mode (no file writes, no log)."""
     src = tmp_path / "a.txt"
     src.write_text("x")
-    files = [(src, "OTHER")]
+    files = [(src, "OTHER", src.stat())]
     dest = tmp_path / "dest"
 
     copied, renamed, target = FileCollectorCore.collect_selected_files(
@@ -189,7 +427,7 @@ def test_collect_selected_files_dry_run_missing_target_dir(tmp_path: Path) -> No
     """Regression: dry-run should work with missing target directory."""
     src = tmp_path / "a.txt"
     src.write_text("x")
-    files = [(src, "OTHER")]
+    files = [(src, "OTHER", src.stat())]
     dest = tmp_path / "missing_dest"
 
     copied, renamed, target = FileCollectorCore.collect_selected_files(
@@ -211,7 +449,7 @@ def test_collect_selected_files_duplicate(tmp_path: Path) -> None:
     src1.write_text("x")
     src2 = tmp_path / "b.txt"
     src2.write_text("x")
-    files = [(src1, "OTHER"), (src2, "OTHER")]
+    files = [(src1, "OTHER", src1.stat()), (src2, "OTHER", src2.stat())]
     copied, renamed, target = FileCollectorCore.collect_selected_files(
         files, tmp_path / "dest", dry_run=False,
         update_status=lambda x: None,
@@ -222,12 +460,56 @@ def test_collect_selected_files_duplicate(tmp_path: Path) -> None:
     assert (target / "log.txt").exists()
 
 
+def test_collect_selected_files_dry_run_metadata_only(tmp_path: Path, monkeypatch) -> None:
+    """Dry run estimates duplicates from size and mtime without reading files."""
+    src1 = tmp_path / "a.txt"
+    src1.write_text("x")
+    src2 = tmp_path / "b.txt"
+    src2.write_text("x")
+    os.utime(src2, ns=(src1.stat().st_atime_ns, src1.stat().st_mtime_ns))
+
+    def fail_hash(_):
+        raise AssertionError("file contents should not be read")
+
+    monkeypatch.setattr(FileCollectorCore, "file_hash", fail_hash)
+    monkeypatch.setattr(FileCollectorCore, "file_head_hash", fail_hash)
+    files = [(src1, "OTHER", src1.stat()), (src2, "OTHER", src2.stat())]
+    copied, renamed, _ = FileCollectorCore.collect_selected_files(
+        files, tmp_path / "dest", dry_run=True,
+        update_status=lambda x: None,
+        update_progress=lambda x: None,
+    )
+    assert copied == 1
+    assert renamed == 1
+
+
+def test_collect_selected_files_dry_run_exact_hash(tmp_path: Path) -> None:
+    """hash_in_dry_run compares contents, so same size and mtime alone is not a duplicate."""
+    src1 = tmp_path / "a.txt"
+    src1.write_text("x")
+    src2 = tmp_path / "b.txt"
+    src2.write_text("y")
+    os.utime(src2, ns=(src1.stat().st_atime_ns, src1.stat().st_mtime_ns))
+    files = [(src1, "OTHER", src1.stat()), (src2, "OTHER", src2.stat())]
+    copied, renamed, target = FileCollectorCore.collect_selected_files(
+        files, tmp_path / "dest", dry_run=True,
+        update_status=lambda x: None,
+        update_progress=lambda x: None,
+        hash_in_dry_run=True,
+    )
+    assert copied == 2
+    assert renamed == 0
+    assert not target.exists()
+
+
 def test_collect_selected_files_unreadable_hash(tmp_path: Path, monkeypatch) -> None:
     """Test handling of unreadable files (hash=None)."""
-    src = tmp_path / "a.txt"
-    src.write_text("x")
+    src1 = tmp_path / "a.txt"
+    src1.write_text("x")
+    src2 = tmp_path / "b.txt"
+    src2.write_text("x")
     monkeypatch.setattr(FileCollectorCore, "file_hash", lambda _: None)
-    files = [(src, "OTHER")]
+    files = [(src1, "OTHER", src1.stat()), (src2, "OTHER", src2.stat())]
     copied, renamed, target = FileCollectorCore.collect_selected_files(
         files, tmp_path / "dest", dry_run=False,
         update_status=lambda x: None,
@@ -237,11 +519,326 @@ def test_collect_selected_files_unreadable_hash(tmp_path: Path, monkeypatch) ->
     assert renamed == 0
 
 
+def test_collect_selected_files_unique_size_not_hashed(tmp_path: Path, monkeypatch) -> None:
+    """Files whose size is unique in the batch are copied without hashing."""
+    src1 = tmp_path / "a.txt"
+    src1.write_text("x")
+    src2 = tmp_path / "b.txt"
+    src2.write_text("yy")
+
+    def fail_hash(_):
+        raise AssertionError("file_hash should not be called")
+
+    monkeypatch.setattr(FileCollectorCore, "file_hash", fail_hash)
+    files = [(src1, "OTHER", src1.stat()), (src2, "OTHER", src2.stat())]
+    copied, renamed, _ = FileCollectorCore.collect_selected_files(
+        files, tmp_path / "dest", dry_run=False,
+        update_status=lambda x: None,
+        update_progress=lambda x: None,
+    )
+    assert copied == 2
+    assert renamed == 0
+
+
+def test_collect_selected_files_same_name_renamed(tmp_path: Path) -> None:
+    """Different files with the same name land under distinct names."""
+    (tmp_path / "d1").mkdir()
+    (tmp_path / "d2").mkdir()
+    src1 = tmp_path / "d1" / "same.txt"
+    src1.write_text("one")
+    src2 = tmp_path / "d2" / "same.txt"
+    src2.write_text("two!")
+    os.utime(src2, (src1.stat().st_atime, src1.stat().st_mtime))
+    files = [(src1, "OTHER", src1.stat()), (src2, "OTHER", src2.stat())]
+    copied, renamed, target = FileCollectorCore.collect_selected_files(
+        files, tmp_path / "dest", dry_run=False,
+        update_status=lambda x: None,
+        update_progress=lambda x: None,
+    )
+    assert copied == 2
+    assert renamed == 1
+    names = sorted(p.name for p in target.rglob("same*.txt"))
+    assert names == ["same.txt", "same_1.txt"]
+
+
+def test_collect_selected_files_case_variant_not_overwritten(tmp_path: Path, monkeypatch) -> None:
+    """On case-insensitive targets a case variant of an existing name is renamed."""
+    monkeypatch.setattr("core.CASE_INSENSITIVE_NAMES", True)
+    src = tmp_path / "img.jpg"
+    src.write_text("new")
+    subdir = tmp_path / "dest" / f"Images_{FileCollectorCore.get_date_folder(src)}"
+    subdir.mkdir(parents=True)
+    (subdir / "IMG.JPG").write_text("old")
+    copied, renamed, _ = FileCollectorCore.collect_selected_files(
+        [(src, "Images", src.stat())], tmp_path / "dest", dry_run=False,
+        update_status=lambda x: None,
+        update_progress=lambda x: None,
+    )
+    assert (copied, renamed) == (1, 1)
+    assert (subdir / "IMG.JPG").read_text() == "old"
+    assert (subdir / "img_1.jpg").read_text() == "new"
+
+
+def test_collect_selected_files_existing_dst_not_overwritten(tmp_path: Path, monkeypatch) -> None:
+    """A name taken behind the in-memory index is skipped, never overwritten."""
+    monkeypatch.setattr("core._existing_names", lambda _: set())
+    src = tmp_path / "a.txt"
+    src.write_text("new")
+    subdir = tmp_path / "dest" / f"OTHER_{FileCollectorCore.get_date_folder(src)}"
+    subdir.mkdir(parents=True)
+    (subdir / "a.txt").write_text("old")
+    copied, _, _ = FileCollectorCore.collect_selected_files(
+        [(src, "OTHER", src.stat())], tmp_path / "dest", dry_run=False,
+        update_status=lambda x: None,
+        update_progress=lambda x: None,
+    )
+    assert copied == 1
+    assert (subdir / "a.txt").read_text() == "old"
+    assert (subdir / "a_1.txt").read_text() == "new"
+
+
+def test_collect_selected_files_copy_failure_cleans_up(tmp_path: Path, monkeypatch) -> None:
+    """A failed copy leaves no partial file and frees its name."""
+    src1 = tmp_path / "d1" / "same.txt"
+    src1.parent.mkdir()
+    src1.write_text("one")
+    src2 = tmp_path / "d2" / "same.txt"
+    src2.parent.mkdir()
+    src2.write_text("two!")
+    real_copy2 = shutil.copy2
+
+    def flaky_copy2(src, dst, **kwargs):
+        if Path(src) == src1:
+            Path(dst).write_text("partial")
+            raise OSError("disk error")
+        return real_copy2(src, dst, **kwargs)
+
+    def fail_copy_file_range(*args, **kwargs):
+        raise OSError("unsupported")
+
+    # Force every copy through the copy2 fallback so the failure hits a created dst.
+    monkeypatch.setattr("core._clonefile", None)
+    monkeypatch.setattr("core.FICLONE", 0)
+    monkeypatch.setattr(os, "copy_file_range", fail_copy_file_range, raising=False)
+    monkeypatch.setattr(shutil, "copy2", flaky_copy2)
+    files = [(src1, "OTHER", src1.stat()), (src2, "OTHER", src2.stat())]
+    copied, renamed, target = FileCollectorCore.collect_selected_files(
+        files, tmp_path / "dest", dry_run=False,
+        update_status=lambda x: None,
+        update_progress=lambda x: None,
+    )
+    assert (copied, renamed) == (1, 0)
+    copies = list(target.rglob("same*.txt"))
+    assert [p.name for p in copies] == ["same.txt"]
+    assert copies[0].read_text() == "two!"
+    assert "SKIP (copy failed)" in (target / "log.txt").read_text(encoding="utf-8")
+
+
+def test_collect_selected_files_missing_source_keeps_existing_dst(
+    tmp_path: Path, monkeypatch
+) -> None:
+    """A copy that fails before creating dst never deletes a file already there."""
+    monkeypatch.setattr("core._existing_names", lambda _: set())
+    src = tmp_path / "a.txt"
+    src.write_text("new")
+    files = [(src, "OTHER", src.stat())]
+    subdir = tmp_path / "dest" / f"OTHER_{FileCollectorCore.get_date_folder(src)}"
+    subdir.mkdir(parents=True)
+    (subdir / "a.txt").write_text("old")
+    src.unlink()  # source vanished after the scan
+    copied, _, _ = FileCollectorCore.collect_selected_files(
+        files, tmp_path / "dest", dry_run=False,
+        update_status=lambda x: None,
+        update_progress=lambda x: None,
+    )
+    assert copied == 0
+    assert (subdir / "a.txt").read_text() == "old"
+
+
+def test_collect_selected_files_log_write_failure_raises(tmp_path: Path, monkeypatch) -> None:
+    """A failing log writer surfaces its OSError instead of reporting success."""
+    real_open = open
+
+    class _FullDisk:
+        def write(self, _line):
+            raise OSError(errno.ENOSPC, "No space left on device")
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    def fake_open(file, *args, **kwargs):
+        if os.fspath(file).endswith("log.txt"):
+            return _FullDisk()
+        return real_open(file, *args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", fake_open)
+    src = tmp_path / "a.txt"
+    src.write_text("x")
+    with pytest.raises(OSError, match="No space left"):
+        FileCollectorCore.collect_selected_files(
+            [(src, "OTHER", src.stat())], tmp_path / "dest", dry_run=False,
+            update_status=lambda x: None,
+            update_progress=lambda x: None,
+        )
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="needs byte-string file names")
+def test_collect_selected_files_logs_undecodable_name(tmp_path: Path) -> None:
+    """A non-UTF-8 file name is copied and logged with escapes, not dropped."""
+    src = Path(os.fsdecode(os.path.join(os.fsencode(tmp_path), b"caf\xe9.txt")))
+    src.write_text("x")
+    copied, _, target = FileCollectorCore.collect_selected_files(
+        [(src, "OTHER", src.stat())], tmp_path / "dest", dry_run=False,
+        update_status=lambda x: None,
+        update_progress=lambda x: None,
+    )
+    assert copied == 1
+    log = (target / "log.txt").read_text(encoding="utf-8")
+    assert "COPY: caf\\udce9.txt" in log
+    assert "Files copied: 1" in log
+
+
+def test_collect_selected_files_throttles_progress(tmp_path: Path) -> None:
+    """Progress callbacks are coalesced to at most one per percent step."""
+    files = []
+    for i in range(300):
+        src = tmp_path / f"f{i}.txt"
+        src.write_text("x" * (i + 1))
+        files.append((src, "OTHER", src.stat()))
+    progress: list[int] = []
+    FileCollectorCore.collect_selected_files(
+        files, tmp_path / "dest", dry_run=True,
+        update_status=lambda x: None,
+        update_progress=progress.append,
+    )
+    assert progress[-1] == 100
+    assert len(progress) <= 101
+
+
+def test_iter_dedup_keys_head_mismatch_not_hashed(tmp_path: Path, monkeypatch) -> None:
+    """Same-size files with different heads skip the full hash."""
+    src1 = tmp_path / "a.txt"
+    src1.write_text("x")
+    src2 = tmp_path / "b.txt"
+    src2.write_text("y")
+
+    def fail_hash(_):
+        raise AssertionError("file_hash should not be called")
+
+    monkeypatch.setattr(FileCollectorCore, "file_hash", fail_hash)
+    files = [(src1, "OTHER", src1.stat()), (src2, "OTHER", src2.stat())]
+    assert list(FileCollectorCore.iter_dedup_keys(files)) == [(None, True), (None, True)]
+
+
+def test_iter_dedup_keys_streams_before_full_hash(tmp_path: Path, monkeypatch) -> None:
+    """Keys not needing a full hash are yielded while full hashes are still running."""
+    unique = tmp_path / "a.txt"
+    unique.write_text("unique")
+    dup1 = tmp_path / "b.txt"
+    dup1.write_text("x")
+    dup2 = tmp_path / "c.txt"
+    dup2.write_text("x")
+    release = threading.Event()
+
+    def slow_hash(_):
+        assert release.wait(5)
+        return b"digest"
+
+    monkeypatch.setattr(FileCollectorCore, "file_hash", slow_hash)
+    files = [(p, "OTHER", p.stat()) for p in (unique, dup1, dup2)]
+    keys = FileCollectorCore.iter_dedup_keys(files)
+    assert next(keys) == (None, True)
+    release.set()
+    assert list(keys) == [((1, b"digest"), True), ((1, b"digest"), True)]
+
+
+def test_iter_dedup_keys_reuses_cached_digests(tmp_path: Path, monkeypatch) -> None:
+    """Unchanged files are not re-hashed on a later run."""
+    src1 = tmp_path / "a.txt"
+    src1.write_text("x")
+    src2 = tmp_path / "b.txt"
+    src2.write_text("x")
+    files = [(src1, "OTHER", src1.stat()), (src2, "OTHER", src2.stat())]
+    first = list(FileCollectorCore.iter_dedup_keys(files))
+    assert first[0][0] is not None and first[0] == first[1]
+
+    def fail_hash(_):
+        raise AssertionError("cached files should not be hashed")
+
+    monkeypatch.setattr(FileCollectorCore, "file_hash", fail_hash)
+    second = list(FileCollectorCore.iter_dedup_keys(files))
+    assert second == first
+    assert all(readable for _, readable in second)
+
+
+@pytest.mark.skipif(os.name != "posix", reason="Windows ctime is creation time, not change time")
+def test_iter_dedup_keys_rehashes_edit_with_preserved_mtime(tmp_path: Path) -> None:
+    """An in-place edit that keeps size and mtime is not served from the cache."""
+    src1 = tmp_path / "a.bin"
+    src1.write_bytes(b"a" * HEAD_HASH_SIZE + b"1")
+    src2 = tmp_path / "b.bin"
+    src2.write_bytes(b"a" * HEAD_HASH_SIZE + b"1")
+    files = [(p, "OTHER", p.stat()) for p in (src1, src2)]
+    first = list(FileCollectorCore.iter_dedup_keys(files))
+    assert first[0] == first[1]
+
+    mtime_ns = src2.stat().st_mtime_ns
+    src2.write_bytes(b"a" * HEAD_HASH_SIZE + b"2")
+    os.utime(src2, ns=(mtime_ns, mtime_ns))  # like exiftool -P or touch -r
+    files = [(p, "OTHER", p.stat()) for p in (src1, src2)]
+    assert files[1][2].st_mtime_ns == mtime_ns
+    second = list(FileCollectorCore.iter_dedup_keys(files))
+    assert second[0][0] != second[1][0]
+
+
+def test_iter_dedup_keys_prunes_stale_cache_rows(
+    tmp_path: Path, monkeypatch, isolated_hash_cache: Path
+) -> None:
+    """Rows for files not seen within HASH_CACHE_MAX_AGE_DAYS are dropped."""
+    old = [tmp_path / "old1.txt", tmp_path / "old2.txt"]
+    new = [tmp_path / "new1.txt", tmp_path / "new2.txt"]
+    for p in old:
+        p.write_text("x")
+    for p in new:
+        p.write_text("yy")
+    list(FileCollectorCore.iter_dedup_keys([(p, "OTHER", p.stat()) for p in old]))
+
+    later = time.time() + (HASH_CACHE_MAX_AGE_DAYS + 1) * 86400
+    monkeypatch.setattr("core.time.time", lambda: later)
+    list(FileCollectorCore.iter_dedup_keys([(p, "OTHER", p.stat()) for p in new]))
+
+    with closing(sqlite3.connect(isolated_hash_cache)) as conn:
+        inodes = {row[0] for row in conn.execute("SELECT ino FROM digests")}
+    assert inodes == {p.stat().st_ino for p in new}
+
+
+def test_iter_dedup_keys_survives_corrupt_cache(tmp_path: Path, isolated_hash_cache: Path) -> None:
+    """A damaged cache file is reset and every candidate is hashed normally."""
+    src1 = tmp_path / "a.txt"
+    src1.write_text("x")
+    src2 = tmp_path / "b.txt"
+    src2.write_text("x")
+    files = [(src1, "OTHER", src1.stat()), (src2, "OTHER", src2.stat())]
+    first = list(FileCollectorCore.iter_dedup_keys(files))
+
+    with open(isolated_hash_cache, "r+b") as f:
+        f.seek(4096)  # keep the header page, garble the table pages
+        f.write(b"\xff" * 8192)
+    second = list(FileCollectorCore.iter_dedup_keys(files))
+    assert second == first
+    assert second[0][0] is not None and second[0] == second[1]
+    third = list(FileCollectorCore.iter_dedup_keys(files))
+    assert third == first
+
+
 def test_check_disk_space_enough(tmp_path: Path, monkeypatch) -> None:
     """Disk preflight returns True when free space is sufficient."""
     src = tmp_path / "a.txt"
     src.write_text("x" * 100)
-    files = [(src, "OTHER")]
+    files = [(src, "OTHER", src.stat())]
 
     class _Usage:
         free = 1024 * 1024
@@ -258,7 +855,7 @@ def test_check_disk_space_insufficient(tmp_path: Path, monkeypatch) -> None:
     """Disk preflight returns False when free space is insufficient."""
     src = tmp_path / "a.txt"
     src.write_text("x" * 10_000)
-    files = [(src, "OTHER")]
+    files = [(src, "OTHER", src.stat())]
 
     class _Usage:
         free = 100
@@ -1,7 +1,10 @@
 """Integration tests for GUI components (mocked)."""
 
+from tkinter import TclError
 from unittest.mock import MagicMock
 
+import pytest
+
 from ui import FileCollectorLauncher
 
 
@@ -65,6 +68,24 @@ class TestFileCollectorLauncher:
 
         assert progress_calls == [0, 50, 100]
 
+    def test_ask_in_ui_returns_dialog_answer(self) -> None:
+        """Dialog answers are handed back to the waiting worker."""
+        mock_launcher = MagicMock(spec=FileCollectorLauncher)
+        mock_launcher._call_in_ui.side_effect = lambda callback: callback()
+
+        assert FileCollectorLauncher._ask_in_ui(mock_launcher, lambda: True) is True
+
+    def test_ask_in_ui_reraises_dialog_error(self) -> None:
+        """A failing dialog raises on the worker instead of leaving it blocked."""
+        mock_launcher = MagicMock(spec=FileCollectorLauncher)
+        mock_launcher._call_in_ui.side_effect = lambda callback: callback()
+
+        def broken_dialog() -> bool:
+            raise TclError("window destroyed")
+
+        with pytest.raises(TclError):
+            FileCollectorLauncher._ask_in_ui(mock_launcher, broken_dialog)
+
 
 class TestSummaryWindow:
     """Test SummaryWindow logic."""
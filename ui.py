@@ -1,5 +1,6 @@
 """GUI components for file collection."""
 
+import queue
 import shutil
 import tempfile
 import threading
@@ -12,12 +13,22 @@ from typing import Any, Callable, Optional
 
 import customtkinter as ctk
 
-from core import FILE_TYPES, FileCollectorCore, logger
+from core import (
+    FILE_TYPES,
+    PREVIEW_MANIFEST,
+    PREVIEW_MAX_FILES,
+    FileCollectorCore,
+    ScannedFile,
+    logger,
+)
 
 # Type alias
 StatusCallback = Callable[[str], None]
 ProgressCallback = Callable[[int], None]
 
+# How often the main loop drains callbacks queued by worker threads
+UI_POLL_MS = 50
+
 
 @dataclass(frozen=True)
 class WorkerArgs:
@@ -26,19 +37,34 @@ class WorkerArgs:
     selected: list[str]
     dry_run: bool
     skip_preview: bool
+    hash_in_dry_run: bool = False
 
 
 class SummaryWindow(ctk.CTkToplevel):
     """Popup window showing summary of the run."""
 
-    def __init__(self, parent, copied: int, renamed: int, target_dir: Path, dry_run: bool):
+    def __init__(
+        self,
+        parent,
+        copied: int,
+        renamed: int,
+        target_dir: Path,
+        dry_run: bool,
+        estimated: bool = False,
+    ):
         super().__init__(parent)
         self.title("Summary")
         self.geometry("520x340")
         self.grab_set()
 
         status = "🧪 DRY RUN: No files copied.\n\n" if dry_run else "✅ DONE\n\n"
-        msg = f"{status}Unique files: {copied}\nDuplicates: {renamed}\nDestination:\n{target_dir}"
+        if estimated:
+            # Metadata-only dry run: counts come from matching size + mtime, not content.
+            status += "Duplicates estimated from size and modification time.\n\n"
+            msg = f"{status}Unique files (est.): ~{copied}\nDuplicates (est.): ~{renamed}"
+        else:
+            msg = f"{status}Unique files: {copied}\nDuplicates: {renamed}"
+        msg += f"\nDestination:\n{target_dir}"
 
         ctk.CTkLabel(self, text=msg, justify="left", wraplength=500).pack(pady=20)
         if not dry_run:
@@ -60,6 +86,8 @@ class FileCollectorLauncher(ctk.CTk):
         self.geometry("780x720")
         self.minsize(650, 520)
 
+        # Worker threads never touch Tk directly; they queue callbacks for the main loop.
+        self._ui_queue: queue.Queue[Callable[[], object]] = queue.Queue()
         self.temp_preview_dir: Optional[Path] = None
         self.source_folder: Optional[str] = None
         self.target_folder: Optional[str] = None
@@ -72,6 +100,11 @@ class FileCollectorLauncher(ctk.CTk):
         self.dry_run_var = ctk.BooleanVar()
         ctk.CTkCheckBox(self, text="Dry run (simulate only)", variable=self.dry_run_var).pack(pady=(10, 0))
 
+        self.hash_in_dry_run_var = ctk.BooleanVar()
+        ctk.CTkCheckBox(
+            self, text="Exact duplicate check in dry run (reads files)", variable=self.hash_in_dry_run_var
+        ).pack(pady=(5, 0))
+
         self.skip_preview_var = ctk.BooleanVar()
         ctk.CTkCheckBox(self, text="Skip Preview", variable=self.skip_preview_var).pack(pady=(5, 10))
 
@@ -119,6 +152,7 @@ class FileCollectorLauncher(ctk.CTk):
         self.dest_label.pack(fill="x", padx=8, pady=2)
 
         self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.after(UI_POLL_MS, self._drain_ui_queue)
 
     def _build_checkboxes(self) -> None:
         """Create category checkbox controls."""
@@ -159,25 +193,57 @@ class FileCollectorLauncher(ctk.CTk):
             self.target_folder = folder
             self.dest_label.configure(text=f"Destination: {folder}")
 
+    def _call_in_ui(self, callback: Callable[[], object]) -> None:
+        """Queue callback to run on the main UI thread (safe from any thread)."""
+        self._ui_queue.put(callback)
+
+    def _ask_in_ui(self, dialog: Callable[[], Any]) -> Any:
+        """Run dialog on the main UI thread and block the calling worker until it returns."""
+        answer: queue.Queue[tuple[bool, Any]] = queue.Queue(maxsize=1)
+
+        def ask() -> None:
+            try:
+                answer.put((True, dialog()))
+            except Exception as exc:  # re-raised on the waiting worker
+                answer.put((False, exc))
+
+        self._call_in_ui(ask)
+        ok, value = answer.get()
+        if not ok:
+            raise value
+        return value
+
+    def _drain_ui_queue(self) -> None:
+        """Run callbacks queued by worker threads, then poll again."""
+        try:
+            while True:
+                try:
+                    callback = self._ui_queue.get_nowait()
+                except queue.Empty:
+                    break
+                callback()
+        finally:
+            self.after(UI_POLL_MS, self._drain_ui_queue)
+
     def update_status_safe(self, text: str) -> None:
         """Thread-safe UI status update."""
-        self.after(0, lambda: self.status_label.configure(text=text))
+        self._call_in_ui(lambda: self.status_label.configure(text=text))
 
     def update_progress_safe(self, val: int) -> None:
         """Thread-safe progress update (0-100)."""
-        self.after(0, lambda: self.progress.set(val / 100))
+        self._call_in_ui(lambda: self.progress.set(val / 100))
 
     def _show_info_safe(self, title: str, message: str) -> None:
         """Show info dialog on main UI thread."""
-        self.after(0, lambda: messagebox.showinfo(title, message))
+        self._call_in_ui(lambda: messagebox.showinfo(title, message))
 
     def _show_error_safe(self, title: str, message: str) -> None:
         """Show error dialog on main UI thread."""
-        self.after(0, lambda: messagebox.showerror(title, message))
+        self._call_in_ui(lambda: messagebox.showerror(title, message))
 
     def _enable_ui_safe(self) -> None:
         """Re-enable controls on main UI thread."""
-        self.after(0, self._enable_ui)
+        self._call_in_ui(self._enable_ui)
 
     def start_process(self) -> None:
         """Validate inputs and start background worker to scan and copy files."""
@@ -201,6 +267,7 @@ class FileCollectorLauncher(ctk.CTk):
             selected=selected,
             dry_run=self.dry_run_var.get(),
             skip_preview=self.skip_preview_var.get(),
+            hash_in_dry_run=self.hash_in_dry_run_var.get(),
         )
         threading.Thread(target=self._worker_wrapper, args=(worker_args,), daemon=True).start()
 
@@ -209,6 +276,7 @@ class FileCollectorLauncher(ctk.CTk):
         selected = args.selected
         dry_run = args.dry_run
         skip_preview = args.skip_preview
+        hash_in_dry_run = args.hash_in_dry_run
 
         try:
             if not self.source_folder:
@@ -218,7 +286,7 @@ class FileCollectorLauncher(ctk.CTk):
 
             self.update_status_safe("Scanning for files...")
             files = FileCollectorCore.filter_files(self.source_folder, selected)
-            self.after(0, lambda: self.progress.configure(mode="determinate"))
+            self._call_in_ui(lambda: self.progress.configure(mode="determinate"))
             self.update_status_safe(f"Found {len(files)} files.")
             self.update_progress_safe(0)
 
@@ -245,41 +313,62 @@ class FileCollectorLauncher(ctk.CTk):
                     return
 
             if skip_preview:
-                self._run_copy(files, target_root, dry_run)
+                self._run_copy(files, target_root, dry_run, hash_in_dry_run)
             else:
-                self.temp_preview_dir = Path(tempfile.gettempdir()) / f"TEMP_SCAN_{now}"
-                FileCollectorCore.preview_files(files, self.temp_preview_dir)
-
-                def ask_user_and_continue():
-                    try:
-                        if messagebox.askyesno("Preview Files?", f"{len(files)} files found.\nPreview in Explorer?"):
-                            if self.temp_preview_dir:
-                                webbrowser.open(str(self.temp_preview_dir))
-                            messagebox.showinfo("Continue", "Click OK to proceed.")
-                        self._run_copy(files, target_root, dry_run)
-                    except (TclError, OSError, RuntimeError, ValueError) as exc:
-                        logger.exception("Error in preview flow: %s", exc)
-                        self._show_error_safe("Error", str(exc))
-                        self._enable_ui_safe()
-
-                self.after(100, ask_user_and_continue)
+                preview_dir = Path(tempfile.gettempdir()) / f"TEMP_SCAN_{now}"
+                prompt = f"{len(files)} files found.\nPreview in Explorer?"
+                if len(files) > PREVIEW_MAX_FILES:
+                    prompt += f"\n(First {PREVIEW_MAX_FILES} shown; full list in {PREVIEW_MANIFEST}.)"
+
+                def show_preview() -> None:
+                    webbrowser.open(str(preview_dir))
+                    messagebox.showinfo("Continue", "Click OK to proceed.")
+
+                # Only the dialogs run on the UI thread: building the preview may fall back
+                # to copying up to PREVIEW_MAX_FILES files, so it stays on this worker.
+                if self._ask_in_ui(lambda: messagebox.askyesno("Preview Files?", prompt)):
+                    self.temp_preview_dir = preview_dir
+                    self.update_status_safe("Building preview...")
+                    FileCollectorCore.preview_files(files, preview_dir)
+                    self._ask_in_ui(show_preview)
+                self._run_copy(files, target_root, dry_run, hash_in_dry_run)
 
         except (TclError, OSError, RuntimeError, ValueError) as exc:
             logger.exception("Error during scan: %s", exc)
             self._show_error_safe("Error", str(exc))
             self._enable_ui_safe()
 
-    def _run_copy(self, files: list[tuple[Path, str]], target_root: Path, dry_run: bool) -> None:
+    def _run_copy(
+        self,
+        files: list[ScannedFile],
+        target_root: Path,
+        dry_run: bool,
+        hash_in_dry_run: bool = False,
+    ) -> None:
         """Run the copy process in a separate thread and handle UI updates."""
+        estimated = dry_run and not hash_in_dry_run
+
         def run():
             try:
                 copied, renamed, target = FileCollectorCore.collect_selected_files(
-                    files, target_root, dry_run, self.update_status_safe, self.update_progress_safe
+                    files,
+                    target_root,
+                    dry_run,
+                    self.update_status_safe,
+                    self.update_progress_safe,
+                    hash_in_dry_run=hash_in_dry_run,
                 )
-                self.update_status_safe(f"Done! Files: {copied}, Duplicates: {renamed}")
+                if estimated:
+                    self.update_status_safe(
+                        f"Done (estimate)! Files: ~{copied}, Duplicates: ~{renamed}"
+                    )
+                else:
+                    self.update_status_safe(f"Done! Files: {copied}, Duplicates: {renamed}")
                 self.update_progress_safe(100)
                 # Show summary window on main thread
-                self.after(100, lambda: SummaryWindow(self, copied, renamed, target, dry_run))
+                self._call_in_ui(
+                    lambda: SummaryWindow(self, copied, renamed, target, dry_run, estimated)
+                )
             except (TclError, OSError, RuntimeError, ValueError) as exc:
                 logger.exception("Error during processing: %s", exc)
                 self._show_error_safe("Error", str(exc))